@@ -11,27 +11,45 @@ Features:
 """
 
 import threading
+import time
 import rclpy
 from rclpy.node import Node
+from rclpy.qos import QoSProfile, QoSHistoryPolicy, QoSReliabilityPolicy
 from std_msgs.msg import String
 
-from mydisplay import display, show_no_errors, TEXT_TO_NUMERIC_ERROR
+from mydisplay import display, show_no_errors, code_for, frame_for
+
+LOOP_START_CODE = "---"
+LOOP_START_DELAY = 0.3
+ERROR_DELAY = 1.0
 
 class DisplayNode(Node):
     """ROS 2 node for 7-segment display with dynamic updates."""
 
     def __init__(self):
         super().__init__('display_node')
+
+        # Only the latest error set matters: keep one message, drop the backlog
+        qos = QoSProfile(
+            history=QoSHistoryPolicy.KEEP_LAST,
+            depth=1,
+            reliability=QoSReliabilityPolicy.RELIABLE
+        )
         self.subscription = self.create_subscription(
             String,
             'sensor_errors',
             self.listener_callback,
-            10
+            qos
         )
 
-        # Thread-safe storage for current errors
+        # Thread-safe storage for the frames of the current errors
+        # (loop-start indicator first, then one 4-char frame per error)
         self.lock = threading.Lock()
-        self.active_errors = []
+        self.frames = []
+
+        # Wakes the display loop as soon as a new error list arrives
+        self._cv = threading.Condition(self.lock)
+        self._dirty = True
 
         # Start display update loop in background thread
         self.display_thread = threading.Thread(target=self.display_loop, daemon=True)
@@ -41,45 +59,60 @@ class DisplayNode(Node):
         show_no_errors(display)
 
     def listener_callback(self, msg):
-        """Update error list dynamically when a new message arrives."""
+        """Rebuild display frames dynamically when a new message arrives."""
         text = msg.data.strip()
         errors = [e.strip() for e in text.split(',') if e.strip()]
-        with self.lock:
-            self.active_errors = errors.copy()
 
-    def display_loop(self):
-        """Continuously update display based on current error list."""
-        import time
+        frames = []
+        if errors:
+            num_errors = str(len(errors))[:1]
+            frames.append(frame_for(num_errors, LOOP_START_CODE))
+            for code_text in errors:
+                frames.append(frame_for(num_errors, code_for(code_text)))
 
-        current_index = 0
-        loop_start_code = "---"
-        loop_start_delay = 0.3
-        error_delay = 1.0
+        with self._cv:
+            # Republishing the same errors must not restart the cycle
+            if frames != self.frames:
+                self.frames = frames
+                self._dirty = True
+                self._cv.notify()
+
+    def _wait_until(self, deadline=None):
+        """Sleep until the monotonic deadline or new errors arrive; True if woken by new data."""
+        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+        with self._cv:
+            return self._cv.wait_for(lambda: self._dirty, timeout=timeout)
+
+    def display_loop(self):
+        """Continuously cycle the display through the current frames."""
+        # Frame deadlines advance by fixed steps so render cost does not drift the cycle
+        deadline = time.monotonic()
 
         while True:
-            with self.lock:
-                errors = self.active_errors.copy()
+            with self._cv:
+                frames = self.frames
+                self._dirty = False
 
-            if not errors:
-                # No errors: show 0000
+            if not frames:
+                # No errors: show 0000 and block until something changes
                 show_no_errors(display)
-                time.sleep(error_delay)
+                self._wait_until()
+                deadline = time.monotonic()
                 continue
 
-            num_errors = str(len(errors))[:1]
-
-            # Show loop-start indicator briefly
-            display.print(num_errors + loop_start_code)
-            display.colon = False
-            time.sleep(loop_start_delay)
-
-            # Cycle through current errors
-            for code_text in errors:
-                code = TEXT_TO_NUMERIC_ERROR.get(code_text.lower(), "999")
-                code_str = str(code).rjust(3, "0")[-3:]
-                display.print(num_errors + code_str)
-                display.colon = False
-                time.sleep(error_delay)
+            # Loop-start indicator briefly, then each error; restart on change.
+            # The colon is cleared once by show_no_errors and never turned on.
+            for i, frame in enumerate(frames):
+                display.print(frame)
+                deadline += LOOP_START_DELAY if i == 0 else ERROR_DELAY
+                if self._wait_until(deadline):
+                    deadline = time.monotonic()
+                    break
+                # After a real stall (more than a frame behind), resync instead
+                # of flashing frames to catch up; normal wakeup latency is kept
+                now = time.monotonic()
+                if now - deadline > ERROR_DELAY:
+                    deadline = now
 
 def main(args=None):
     rclpy.init(args=args)
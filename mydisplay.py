@@ -1,17 +1,75 @@
 """
 mydisplay.py - 7-segment display simulator and hardware interface.
 
-Supports simulation using Tkinter or real Adafruit HT16K33 hardware.
+Supports simulation using Tkinter, real Adafruit HT16K33 hardware, or a
+headless backend that only records frames (for tests and CI).
 Provides functions to display single or multiple sensor errors and
 show a no-error state.
+
+The backend is selected with the DISPLAY_BACKEND environment variable:
+"sim" (default), "hw" for Raspberry Pi hardware, or "null" for headless.
 """
 
-USE_SIM = True  # Set False for Raspberry Pi hardware
+import functools
+import os
+import sys
+import types
+
+BACKEND = os.environ.get("DISPLAY_BACKEND", "sim")
+USE_SIM = BACKEND == "sim"
+
+# -----------------------------
+# Text → numeric error mapping (shared by all backends, read-only)
+# -----------------------------
+TEXT_TO_NUMERIC_ERROR = types.MappingProxyType({
+    "lidar_com":    "101",
+    "lidar_fail":   "201",
+    "emi_com":      "102",
+    "emi_fail":     "202",
+    "imu_com":      "103",
+    "imu_fail":     "203",
+    "raspberry_com":"104",
+    "raspberry_fail":"204",
+    "camera_com":   "105",
+    "camera_fail":  "205",
+    "ip_mesh_com":  "106",
+    "ip_mesh_fail": "206",
+    "gps_com":      "107",
+    "gps_fail":     "207",
+    "general_fail": "999"  # Catch-all unknown error
+})
+
+# Error key → ready-to-display 3-char code (keys are lowercase)
+_DISPLAY_CODE_BY_KEY = {k: str(v).rjust(3, "0")[-3:] for k, v in TEXT_TO_NUMERIC_ERROR.items()}
+
+
+@functools.lru_cache(maxsize=64)
+def code_for(error_text):
+    """Return the 3-digit display code for an error key ('999' if unknown)."""
+    return _DISPLAY_CODE_BY_KEY.get(error_text if error_text.islower() else error_text.lower(), "999")
+
+
+# Every frame the error loops can show (count digit + code or loop-start '---'),
+# built and interned once so callers reuse the same string objects
+_ALL_FRAMES = {
+    (n, code): sys.intern(n + code)
+    for n in "0123456789"
+    for code in set(_DISPLAY_CODE_BY_KEY.values()) | {"---"}
+}
+
+
+def frame_for(num_errors, code):
+    """Return the 4-char frame for a 1-digit error count and a 3-char code."""
+    frame = _ALL_FRAMES.get((num_errors, code))
+    return frame if frame is not None else num_errors + code
+
 
 if USE_SIM:
     import tkinter as tk
-    import threading
-    import time
+
+    # Segment colors when lit / unlit
+    _ON = "red"
+    _OFF = "gray20"
 
     # -----------------------------
     # Segment shapes relative to each digit canvas
@@ -40,6 +98,8 @@ if USE_SIM:
         " ": "",
         "-": "g",
     }
+    # Active segments as frozensets for O(1) membership tests
+    DIGITS = {ch: frozenset(active) for ch, active in DIGITS.items()}
 
     # -----------------------------
     # Single 7-segment digit class
@@ -53,15 +113,35 @@ if USE_SIM:
             self.canvas.place(x=x_offset, y=0)
             self.segs = {}
             for name, coords in SEGMENTS.items():
-                self.segs[name] = self.canvas.create_polygon(coords, fill="gray20", outline="")
-            self.dp = self.canvas.create_oval(95, 145, 105, 155, fill="gray20", outline="")
+                self.segs[name] = self.canvas.create_polygon(coords, fill=_OFF, outline="")
+            self.dp = self.canvas.create_oval(95, 145, 105, 155, fill=_OFF, outline="")
+            self._char = " "
+            self._dp_on = False
+
+            # Pre-render segment colors per character, then the (seg_id, fill)
+            # changes needed to go from any character to any other
+            self._char_table = {
+                ch: {self.segs[name]: _ON if name in active else _OFF for name in SEGMENTS}
+                for ch, active in DIGITS.items()
+            }
+            self._transitions = {
+                (old, new): [(seg_id, fill) for seg_id, fill in new_fills.items()
+                             if self._char_table[old][seg_id] != fill]
+                for old in DIGITS
+                for new, new_fills in self._char_table.items()
+            }
 
         def set_char(self, char, show_dp=False):
             """Set the character to display on this digit; optionally show decimal point."""
-            active = DIGITS.get(char, "")
-            for name, seg_id in self.segs.items():
-                self.canvas.itemconfig(seg_id, fill="red" if name in active else "gray20")
-            self.canvas.itemconfig(self.dp, fill="red" if show_dp else "gray20")
+            if char not in DIGITS:
+                char = " "
+            # Only touch segments whose on/off state actually changes
+            for seg_id, fill in self._transitions[self._char, char]:
+                self.canvas.itemconfig(seg_id, fill=fill)
+            self._char = char
+            if show_dp != self._dp_on:
+                self.canvas.itemconfig(self.dp, fill=_ON if show_dp else _OFF)
+                self._dp_on = show_dp
 
     # -----------------------------
     # 4-digit 7-segment display class
@@ -75,19 +155,31 @@ if USE_SIM:
             self.root.title("7-Segment Display Simulator")
             self.root.geometry(f"{20 + 4*115 + 20}x200")  # Increase width for spacing
             self.digits = [SevenSegDigit(self.root, x_offset=20 + i*115) for i in range(4)]
+            self._set_chars = tuple(d.set_char for d in self.digits)
 
             # Colon in center
             self.colon_canvas = tk.Canvas(self.root, width=20, height=160, bg="black", highlightthickness=0)
             self.colon_canvas.place(x=230, y=0)
-            self.colon1 = self.colon_canvas.create_oval(5, 50, 15, 60, fill="gray20", outline="")
-            self.colon2 = self.colon_canvas.create_oval(5, 100, 15, 110, fill="gray20", outline="")
+            self.colon1 = self.colon_canvas.create_oval(5, 50, 15, 60, fill=_OFF, outline="")
+            self.colon2 = self.colon_canvas.create_oval(5, 100, 15, 110, fill=_OFF, outline="")
             self._colon = False
+            self._last_text = None
 
         def print(self, text):
-            """Display a string of up to 4 digits on the display."""
-            text = str(text).rjust(4, "0")[-4:]
-            for i, ch in enumerate(text):
-                self.digits[i].set_char(ch)
+            """Display a string of up to 4 digits on the display (safe from any thread)."""
+            # Callers normally pass ready-made 4-char frames; skip normalizing those
+            if not (type(text) is str and len(text) == 4):
+                text = str(text).rjust(4, "0")[-4:]
+            if text == self._last_text:
+                return
+            self._last_text = text
+            # Apply all digit updates in one batch on the Tk thread
+            self.root.after(0, self._apply_print, text)
+
+        def _apply_print(self, text):
+            """Update all 4 digits; must run on the Tk thread."""
+            for set_char, ch in zip(self._set_chars, text):
+                set_char(ch)
 
         @property
         def colon(self):
@@ -96,9 +188,16 @@ if USE_SIM:
 
         @colon.setter
         def colon(self, state: bool):
-            """Set colon visibility on the display."""
+            """Set colon visibility on the display (safe from any thread)."""
+            state = bool(state)
+            if state == self._colon:
+                return
             self._colon = state
-            color = "red" if state else "gray20"
+            self.root.after(0, self._apply_colon, state)
+
+        def _apply_colon(self, state):
+            """Update both colon dots; must run on the Tk thread."""
+            color = _ON if state else _OFF
             self.colon_canvas.itemconfig(self.colon1, fill=color)
             self.colon_canvas.itemconfig(self.colon2, fill=color)
 
@@ -109,25 +208,21 @@ if USE_SIM:
     display = Seg7x4()
 
     # -----------------------------
-    # Text → numeric error mapping
+    # Current animation: one pending root.after callback at most
     # -----------------------------
-    TEXT_TO_NUMERIC_ERROR = {
-        "lidar_com":    "101",
-        "lidar_fail":   "201",
-        "emi_com":      "102",
-        "emi_fail":     "202",
-        "imu_com":      "103",
-        "imu_fail":     "203",
-        "raspberry_com":"104",
-        "raspberry_fail":"204",
-        "camera_com":   "105",
-        "camera_fail":  "205",
-        "ip_mesh_com":  "106",
-        "ip_mesh_fail": "206",
-        "gps_com":      "107",
-        "gps_fail":     "207",
-        "general_fail": "999"  # Catch-all unknown error
-    }
+    _pending_after = None
+
+    def _schedule(display, delay, func, *args):
+        """Schedule the next animation step after delay seconds and record its after id."""
+        global _pending_after
+        _pending_after = display.root.after(int(delay * 1000), func, *args)
+
+    def _cancel_animation(display):
+        """Stop the running animation, if any."""
+        global _pending_after
+        if _pending_after is not None:
+            display.root.after_cancel(_pending_after)
+            _pending_after = None
 
     # -----------------------------
     # Display a single error repeatedly
@@ -143,15 +238,15 @@ if USE_SIM:
             delay (float): Delay in seconds between updates.
         """
         error_number = str(error_number)[0]
-        code = TEXT_TO_NUMERIC_ERROR.get(error_text.lower(), "999")
+        frame = frame_for(error_number, code_for(error_text))
 
-        def loop():
-            while True:
-                display.print(error_number + code)
-                display.colon = False
-                time.sleep(delay)
+        def tick():
+            display.print(frame)
+            _schedule(display, delay, tick)
 
-        threading.Thread(target=loop, daemon=True).start()
+        _cancel_animation(display)
+        display.colon = False
+        _schedule(display, 0, tick)
 
     # -----------------------------
     # Display multiple errors in a loop
@@ -167,45 +262,74 @@ if USE_SIM:
             loop_start_code (str): Temporary code to show loop restart.
             loop_start_delay (float): Duration to show loop_start_code.
         """
-        numeric_codes = []
-        for txt in error_text_list:
-            numeric_codes.append(TEXT_TO_NUMERIC_ERROR.get(txt.lower(), "999"))
+        numeric_codes = [code_for(txt) for txt in error_text_list]
 
         num_errors = str(len(numeric_codes))[:1]
 
-        def loop():
-            while True:
-                # Show the loop start code briefly
-                display.print(num_errors + loop_start_code)
-                display.colon = False
-                time.sleep(loop_start_delay)
+        # Loop start code first, then the actual errors
+        frames = [frame_for(num_errors, loop_start_code)] + [frame_for(num_errors, code_str) for code_str in numeric_codes]
 
-                # Cycle through the actual errors
-                for code in numeric_codes:
-                    code_str = str(code).rjust(3, "0")[-3:]
-                    display.print(num_errors + code_str)
-                    display.colon = False
-                    time.sleep(delay)
+        def tick(i=0):
+            display.print(frames[i])
+            wait = loop_start_delay if i == 0 else delay
+            _schedule(display, wait, tick, (i + 1) % len(frames))
 
-        threading.Thread(target=loop, daemon=True).start()
+        _cancel_animation(display)
+        display.colon = False
+        _schedule(display, 0, tick)
 
-    # -----------------------------
-    # Show no errors
-    # -----------------------------
-    def show_no_errors(display):
-        """Display '0000' to indicate no errors."""
-        display.print("0000")
+# -----------------------------
+# Headless version (tests / CI)
+# -----------------------------
+elif BACKEND == "null":
+    import collections
+
+    class NullDisplay:
+        """Display stand-in that records printed frames instead of drawing them."""
+
+        def __init__(self, max_frames=256):
+            self.colon = False
+            self.last = None
+            # Bounded so long-running headless nodes don't grow without limit
+            self.frames = collections.deque(maxlen=max_frames)
+
+        def print(self, text):
+            """Record the 4-char frame that would be displayed."""
+            text = str(text).rjust(4, "0")[-4:]
+            self.last = text
+            self.frames.append(text)
+
+        def run(self):
+            """No main loop in headless mode."""
+            pass
+
+    display = NullDisplay()
+
+    def show_error_loop(error_number, error_text, display, delay=0.5):
+        """Record the single error frame once (no loop in headless mode)."""
+        error_number = str(error_number)[0]
+        display.print(frame_for(error_number, code_for(error_text)))
+        display.colon = False
+
+    def show_multiple_text_errors(error_text_list, display, delay=1.0, loop_start_code="---", loop_start_delay=0.3):
+        """Record one pass of the error cycle (no loop in headless mode)."""
+        num_errors = str(len(error_text_list))[:1]
+        display.print(frame_for(num_errors, loop_start_code))
+        for txt in error_text_list:
+            display.print(frame_for(num_errors, code_for(txt)))
         display.colon = False
 
 # -----------------------------
 # Hardware version (Raspberry Pi)
 # -----------------------------
-else:
+elif BACKEND == "hw":
     import board
     import busio
     from adafruit_ht16k33.segments import Seg7x4
+    import logging
     import threading
-    import time
+
+    _log = logging.getLogger(__name__)
 
     i2c = busio.I2C(board.SCL, board.SDA)
     display = Seg7x4(i2c)
@@ -215,41 +339,73 @@ else:
         pass
     display.run = _dummy_run
 
-    TEXT_TO_NUMERIC_ERROR = {
-        "general": "999",
-        "overflow": "888",
-        "underflow": "001",
-        "sensor_fail": "123",
-        "invalid_input": "432",
-    }
+    class _AnimationScheduler:
+        """Single worker thread that loops the current animation on a display."""
+
+        def __init__(self):
+            self._cv = threading.Condition()
+            self._display = None
+            self._sequence = []
+            self._thread = None
+
+        def set_sequence(self, display, sequence):
+            """Atomically replace the running animation with (frame, delay) pairs."""
+            with self._cv:
+                self._display = display
+                self._sequence = list(sequence)
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+                self._cv.notify()
+
+        def _run(self):
+            last_sequence = None
+            while True:
+                with self._cv:
+                    while not self._sequence:
+                        self._cv.wait()
+                    display, sequence = self._display, self._sequence
+
+                # Clear the colon once per new animation, not on every pass
+                if sequence is not last_sequence:
+                    try:
+                        display.colon = False
+                        last_sequence = sequence
+                    except OSError:
+                        _log.exception("Colon write failed; retrying next pass")
+                for frame, delay in sequence:
+                    try:
+                        display.print(frame)
+                    except OSError:
+                        # Transient I2C errors must not kill the only worker thread
+                        _log.exception("Display write failed for frame %r", frame)
+                    with self._cv:
+                        # Stop early if a new animation was set meanwhile
+                        if self._cv.wait_for(lambda: self._sequence is not sequence, timeout=delay):
+                            break
+
+    _scheduler = _AnimationScheduler()
 
     def show_error_loop(error_number, error_text, display, delay=0.5):
         """Display a single error continuously on hardware."""
         error_number = str(error_number)[0]
-        code = TEXT_TO_NUMERIC_ERROR.get(error_text.lower(), "999")
-
-        def loop():
-            while True:
-                display.print(error_number + code)
-                display.colon = False
-                time.sleep(delay)
-
-        threading.Thread(target=loop, daemon=True).start()
+        frame = frame_for(error_number, code_for(error_text))
+        _scheduler.set_sequence(display, [(frame, delay)])
 
     def show_multiple_text_errors(error_text_list, display, delay=1.0):
         """Display multiple errors sequentially on hardware."""
-        numeric_codes = []
-        for txt in error_text_list:
-            numeric_codes.append(TEXT_TO_NUMERIC_ERROR.get(txt.lower(), "999"))
+        numeric_codes = [code_for(txt) for txt in error_text_list]
 
         num_errors = str(len(numeric_codes))[:1]
+        _scheduler.set_sequence(display, [(frame_for(num_errors, code_str), delay) for code_str in numeric_codes])
 
-        def loop():
-            while True:
-                for code in numeric_codes:
-                    code_str = str(code).rjust(3, "0")[-3:]
-                    display.print(num_errors + code_str)
-                    display.colon = False
-                    time.sleep(delay)
+else:
+    raise ValueError(f"unknown DISPLAY_BACKEND {BACKEND!r}; expected sim, hw or null")
 
-        threading.Thread(target=loop, daemon=True).start()
+# -----------------------------
+# Show no errors
+# -----------------------------
+def show_no_errors(display):
+    """Display '0000' to indicate no errors."""
+    display.print("0000")
+    display.colon = False